@@ -1,14 +1,22 @@
+import asyncio
 import os
 import platform
 import shutil
 import subprocess
 import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from flask import Flask, Response, jsonify, render_template, request
 
-if platform.system() == "Windows":
+# Host OS never changes at runtime; avoid platform.system() (uname) on every call
+_SYS = platform.system()
+_IS_WIN = _SYS == "Windows"
+_IS_MAC = _SYS == "Darwin"
+
+if _IS_WIN:
     # Prefer MSMF over DSHOW by index, can be overridden via env
     os.environ.setdefault("OPENCV_VIDEOIO_PRIORITY_MSMF", "1000")
     os.environ.setdefault("OPENCV_VIDEOIO_PRIORITY_DSHOW", "0")
@@ -16,6 +24,31 @@ try:
     import cv2  # type: ignore
 except Exception as e:  # pragma: no cover
     raise RuntimeError("OpenCV (opencv-python) is required to run this app.") from e
+import numpy as np  # installed with opencv-python
+
+# Optional: nvJPEG via pynvjpeg (NVIDIA GPU encode); one shared encoder, used only if CUDA initializes
+try:
+    from nvjpeg import NvJpeg  # type: ignore
+    NVJ = NvJpeg()
+except Exception:
+    NVJ = None
+# The encoder keeps per-instance CUDA state; serialize calls from the HTTP threads
+_NVJ_LOCK = threading.Lock()
+
+# Optional: PyTurboJPEG (libjpeg-turbo SIMD); one shared instance, used only if its native library loads
+try:
+    from turbojpeg import TJPF_BGR, TJSAMP_420, TJSAMP_422, TJSAMP_444, TurboJPEG  # type: ignore
+    TJ = TurboJPEG()
+    _TJ_SAMPLING = {"420": TJSAMP_420, "422": TJSAMP_422, "444": TJSAMP_444}
+except Exception:
+    TJ = None
+    _TJ_SAMPLING = {}
+
+# Optional: simplejpeg (libjpeg-turbo) for faster JPEG encoding than cv2.imencode
+try:
+    import simplejpeg  # type: ignore
+except Exception:
+    simplejpeg = None
 
 # Optional: pygrabber for DirectShow device enumeration (Windows)
 try:
@@ -23,14 +56,29 @@ try:
 except Exception:
     _PyGrabberFilterGraph = None
 
+# Optional: WinRT device enumeration (Windows), in-process instead of spawning ffmpeg
+try:
+    import winrt.windows.devices.enumeration as _WinRTEnum  # type: ignore
+except Exception:
+    _WinRTEnum = None
+
 
 APP_DIR = os.path.dirname(os.path.abspath(__file__))
 FALLBACK_DIR = os.path.join(APP_DIR, "captured_images")
 WINDOWS_TARGET_DIR = r"C:\\Users\\d649578\\Desktop\\test images pc logitech"
 
 
+# Directories already created/verified this run; saves a makedirs syscall on every /capture
+_VALID_DIRS: set[str] = set()
+
+
 def ensure_dir(path: str) -> None:
+    # Keyed on the normalized path so "/x/" and os.path.dirname() of a file in it match
+    key = os.path.normpath(path)
+    if key in _VALID_DIRS:
+        return
     os.makedirs(path, exist_ok=True)
+    _VALID_DIRS.add(key)
 
 
 def is_dir(path: str) -> bool:
@@ -42,7 +90,7 @@ def is_dir(path: str) -> bool:
 
 def get_save_dir() -> tuple[str, bool]:
     # Prefer the requested Windows path when present and usable
-    is_windows = platform.system().lower().startswith("win")
+    is_windows = _IS_WIN
     if is_dir(WINDOWS_TARGET_DIR):
         try:
             ensure_dir(WINDOWS_TARGET_DIR)
@@ -55,95 +103,310 @@ def get_save_dir() -> tuple[str, bool]:
     return FALLBACK_DIR, False
 
 
+_FILENAME_SAFE_CHARS = frozenset("-_+.")
+
+
+class _FilenameTable(dict):
+    # str.translate table: alnum or safe punctuation is kept, anything else deleted. Only ASCII
+    # decisions are memoized; the input is user-supplied, so other code points stay uncached
+    # to keep the table bounded
+    def __missing__(self, cp: int):
+        ch = chr(cp)
+        keep = cp if (ch.isalnum() or ch in _FILENAME_SAFE_CHARS) else None
+        if cp < 128:
+            self[cp] = keep
+        return keep
+
+
+_FILENAME_TABLE = _FilenameTable()
+
+
 def sanitize_filename(name: str, for_windows: bool) -> str:
     # Allow alnum and a small safe charset; strip trailing dots
-    safe = "".join(ch for ch in name if ch.isalnum() or ch in ("-", "_", "+", "."))
+    safe = name.translate(_FILENAME_TABLE)
     if for_windows:
         safe = safe.replace(":", "-")
     return safe.strip(".") or "image"
 
 
-def format_filename(user_base: str, for_windows: bool) -> str:
-    now = datetime.now().astimezone()
-    date_part = now.strftime("%d%m%y")
-    time_part = now.strftime("%H%M%S")
-
+def _build_tz_label(total_seconds: int) -> str:
     # Build timezone label as +HH (hours only), matching the example style
-    offset = now.utcoffset() or now.tzinfo.utcoffset(now)  # type: ignore[arg-type]
-    total_seconds = int(offset.total_seconds()) if offset else 0
     sign = "+" if total_seconds >= 0 else "-"
     hours = abs(total_seconds) // 3600
-    tz_label = f"{sign}{hours:02d}"
+    return f"{sign}{hours:02d}"
+
+
+# (UTC offset in seconds, label); rebuilt only when the offset changes, e.g. at a DST switch
+_TZ_LABEL: tuple[int, str] | None = None
 
+
+def _tz_label() -> str:
+    global _TZ_LABEL
+    offset = time.localtime().tm_gmtoff
+    cached = _TZ_LABEL
+    if cached is None or cached[0] != offset:
+        cached = (offset, _build_tz_label(offset))
+        _TZ_LABEL = cached
+    return cached[1]
+
+
+def format_filename(user_base: str, for_windows: bool) -> str:
+    stamp = datetime.now().strftime("%d%m%yT%H%M%S")
     base = sanitize_filename(user_base, for_windows)
-    return f"image_{base}_pc{date_part}T{time_part}{tz_label}.jpg"
+    return f"image_{base}_pc{stamp}{_tz_label()}.jpg"
+
+
+# Preview frames are bandwidth-bound: lower quality + 4:2:0 chroma roughly halves each part
+STREAM_JPEG_QUALITY = int(os.environ.get("STREAM_JPEG_QUALITY", "70"))
+STREAM_JPEG_SUBSAMPLING = os.environ.get("STREAM_JPEG_SUBSAMPLING", "420")
+CAPTURE_JPEG_QUALITY = 90
+# Explicit so saved stills match across machines (encoder defaults differ: TurboJPEG 4:2:2,
+# simplejpeg 4:4:4, OpenCV 4:2:0); 420 keeps the original OpenCV output
+CAPTURE_JPEG_SUBSAMPLING = os.environ.get("CAPTURE_JPEG_SUBSAMPLING", "420")
+STREAM_MAX_FPS = 30.0
+# The browser preview rarely needs full 1080p; downscale the encoded stream to this width (0 = off).
+# Captures always use the full-resolution frame.
+STREAM_PREVIEW_WIDTH = int(os.environ.get("STREAM_PREVIEW_WIDTH", "960"))
+# MJPG pass-through (V4L2) forwards the camera's own full-size JPEGs, bypassing the three settings
+# above; set STREAM_MJPEG_PASSTHROUGH=0 to decode and re-encode a smaller preview instead
+STREAM_MJPEG_PASSTHROUGH = os.environ.get("STREAM_MJPEG_PASSTHROUGH", "1") != "0"
+
+_CV2_SAMPLING = {
+    "420": getattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR_420", None),
+    "422": getattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR_422", None),
+    "444": getattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR_444", None),
+}
+
+
+def encode_jpeg(
+    frame,
+    quality: int,
+    subsampling: str | None = None,
+    out: bytearray | None = None,
+) -> bytes | None:
+    # Prefer the GPU (nvJPEG), then libjpeg-turbo (PyTurboJPEG, then simplejpeg); fall back to
+    # OpenCV's encoder. `out` is a caller-owned scratch buffer TurboJPEG compresses into, so
+    # repeated encodes (one stream client) skip libjpeg-turbo's per-frame allocation.
+    if NVJ is not None:
+        try:
+            with _NVJ_LOCK:
+                return bytes(NVJ.encode(np.ascontiguousarray(frame), int(quality)))
+        except Exception:
+            pass
+    if TJ is not None:
+        try:
+            kwargs = {"jpeg_subsample": _TJ_SAMPLING[subsampling]} if subsampling in _TJ_SAMPLING else {}
+            if out is None:
+                return TJ.encode(frame, quality=int(quality), pixel_format=TJPF_BGR, **kwargs)
+            need = TJ.buffer_size(frame, **kwargs)
+            if len(out) < need:
+                out.extend(bytes(need - len(out)))
+            _, size = TJ.encode(frame, quality=int(quality), pixel_format=TJPF_BGR, dst=out, **kwargs)
+            return bytes(memoryview(out)[:size])
+        except Exception:
+            pass
+    if simplejpeg is not None:
+        try:
+            kwargs = {"colorsubsampling": subsampling} if subsampling else {}
+            return simplejpeg.encode_jpeg(np.ascontiguousarray(frame), quality=quality, colorspace="BGR", **kwargs)
+        except Exception:
+            pass
+    # Single-pass Huffman (OPTIMIZE is an int flag: 0 skips the second pass that roughly doubles
+    # encode CPU) and a restart marker every 16 MCUs (libjpeg restart_interval counts MCUs, not
+    # rows) so decoders can resync and parallelize
+    params = [cv2.IMWRITE_JPEG_QUALITY, int(quality), cv2.IMWRITE_JPEG_OPTIMIZE, 0]
+    if hasattr(cv2, "IMWRITE_JPEG_RST_INTERVAL"):
+        params += [cv2.IMWRITE_JPEG_RST_INTERVAL, 16]
+    sampling = _CV2_SAMPLING.get(subsampling or "")
+    if sampling is not None and hasattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR"):
+        params += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, int(sampling)]
+    ok, buf = cv2.imencode(".jpg", frame, params)
+    if not ok:
+        return None
+    return bytes(buf)
 
 
-def open_camera_by_index(index: int):
-    # Try likely backends per OS (prefer Media Foundation on Windows for index capture)
-    system = platform.system()
-    backends: list[int] = []
-    if system == "Windows":
-        backends = [getattr(cv2, "CAP_MSMF", 1400), getattr(cv2, "CAP_DSHOW", 700), cv2.CAP_ANY]
-    elif system == "Darwin":
-        backends = [cv2.CAP_AVFOUNDATION, cv2.CAP_ANY]
-    else:
-        backends = [cv2.CAP_V4L2, cv2.CAP_ANY]
+def decode_jpeg(data: bytes):
+    # JPEG bytes -> BGR ndarray; libjpeg-turbo when available
+    if TJ is not None:
+        try:
+            return TJ.decode(data, pixel_format=TJPF_BGR)
+        except Exception:
+            pass
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
 
-    # Candidate resolutions from high to low
-    resolutions = [(1920, 1080), (1280, 720), (640, 480)]
 
-    for backend in backends:
-        cap = cv2.VideoCapture(index, backend)
-        if not cap.isOpened():
-            try:
-                cap.release()
-            except Exception:
-                pass
-            continue
+def write_bytes(path: str, data: bytes) -> None:
+    # Single open/write/close on a raw fd; O_BINARY matters on Windows. Raises OSError on failure.
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+# Disk writes run off the request thread; failures are reported on the next /capture
+# and, with in-flight paths, via GET /capture_status
+_WRITER = ThreadPoolExecutor(max_workers=2)
+_PENDING_WRITES: dict[str, object] = {}
+_FAILED_WRITES: set[str] = set()
+# Guards _PENDING_WRITES so lookup, submit and store are one step across request threads
+_WRITES_LOCK = threading.Lock()
+
+
+def _write_capture(path: str, data: bytes) -> None:
+    folder = os.path.dirname(path)
+    try:
         try:
-            # Set codec/fps if supported
-            try:
-                fourcc = cv2.VideoWriter_fourcc(*"MJPG")
-                cap.set(cv2.CAP_PROP_FOURCC, fourcc)
-                cap.set(cv2.CAP_PROP_FPS, 30)
-            except Exception:
-                pass
+            write_bytes(path, data)
+        except FileNotFoundError:
+            # The cached folder was removed after it was verified; recreate it and retry once
+            os.makedirs(folder, exist_ok=True)
+            write_bytes(path, data)
+    except OSError:
+        _FAILED_WRITES.add(path)
+        # Re-check the folder on the next capture
+        _VALID_DIRS.discard(os.path.normpath(folder))
+
+
+def _forget_write(path: str, future) -> None:
+    # A later capture of the same file may already own the entry; only drop our own
+    with _WRITES_LOCK:
+        if _PENDING_WRITES.get(path) is future:
+            del _PENDING_WRITES[path]
+
+
+def _submit_capture_write(path: str, data: bytes) -> None:
+    # Two captures in the same second share a filename; finish the earlier write first
+    # so the two workers never interleave on one file
+    while True:
+        with _WRITES_LOCK:
+            earlier = _PENDING_WRITES.get(path)
+            if earlier is None or earlier.done():  # type: ignore[attr-defined]
+                future = _WRITER.submit(_write_capture, path, data)
+                _PENDING_WRITES[path] = future
+                break
+        # Wait outside the lock; the earlier write's callback needs it to clean up
+        try:
+            earlier.result()  # type: ignore[attr-defined]
+        except Exception:
+            pass
+    # Runs at once if the write already finished, so the entry can never be left behind
+    future.add_done_callback(lambda f: _forget_write(path, f))
 
-            # Try resolutions with warmup and verify a readable frame
-            for (w, h) in resolutions:
-                try:
-                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, w)
-                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, h)
-                except Exception:
-                    pass
-                # small settle time
-                time.sleep(0.2)
-                # warm-up reads
-                for _ in range(5):
-                    cap.read()
-                ok, frame = cap.read()
-                if ok and frame is not None:
-                    return cap
+
+def _as_jpeg_bytes(frame) -> bytes | None:
+    # Raw MJPG reads come back as a flat uint8 buffer instead of an HxWx3 image
+    if frame is None or frame.ndim == 3 or frame.size < 2:
+        return None
+    flat = frame.reshape(-1)
+    if flat[0] != 0xFF or flat[1] != 0xD8:
+        return None
+    return flat.tobytes()
+
+
+def _enable_mjpeg_passthrough(cap) -> bool:
+    # With RGB conversion off, V4L2 hands back the camera's own MJPG buffer (no decode)
+    try:
+        if cap.set(cv2.CAP_PROP_CONVERT_RGB, 0):
+            ok, frame = cap.read()
+            if ok and _as_jpeg_bytes(frame) is not None:
+                return True
+    except Exception:
+        pass
+    try:
+        cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+    except Exception:
+        pass
+    return False
+
+
+# Candidate resolutions from high to low
+_CAPTURE_RESOLUTIONS = [(1920, 1080), (1280, 720), (640, 480)]
+
+
+def _release_quietly(cap) -> None:
+    try:
+        cap.release()
+    except Exception:
+        pass
+
+
+def _configure_and_verify(cap, settle: float) -> bool:
+    try:
+        # Keep only the newest frame queued so reads are never stale
+        try:
+            single_buffer = bool(cap.set(cv2.CAP_PROP_BUFFERSIZE, 1))
+        except Exception:
+            single_buffer = False
+        # Always ask for MJPG so the camera compresses on-device (and FPS even if FOURCC is refused)
+        try:
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
         except Exception:
             pass
         try:
-            cap.release()
+            cap.set(cv2.CAP_PROP_FPS, 30)
         except Exception:
             pass
+        # Try resolutions from high to low and verify a readable frame
+        for (w, h) in _CAPTURE_RESOLUTIONS:
+            try:
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, w)
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, h)
+            except Exception:
+                pass
+            # small settle time
+            time.sleep(settle)
+            if not single_buffer:
+                # Backend ignores BUFFERSIZE (e.g. MSMF): drop one queued frame before verifying
+                cap.read()
+            ok, frame = cap.read()
+            if ok and frame is not None:
+                return True
+    except Exception:
+        pass
+    return False
+
+
+def _iter_caps(sources):
+    # Yield (cap, backend) for every (source, backend) pair that opens; the caller keeps or releases it
+    for source, backend in sources:
+        cap = cv2.VideoCapture(source, backend)
+        if not cap.isOpened():
+            _release_quietly(cap)
+            continue
+        yield cap, backend
+
+
+def _open_first(sources, settle: float):
+    for cap, backend in _iter_caps(sources):
+        if _configure_and_verify(cap, settle):
+            if backend == cv2.CAP_V4L2 and STREAM_MJPEG_PASSTHROUGH:
+                _enable_mjpeg_passthrough(cap)
+            return cap
+        _release_quietly(cap)
     return None
 
 
+# Likely backends per OS (prefer Media Foundation on Windows for index capture)
+if _IS_WIN:
+    _BACKENDS = (getattr(cv2, "CAP_MSMF", 1400), getattr(cv2, "CAP_DSHOW", 700), cv2.CAP_ANY)
+    _PROBE_BACKENDS = (getattr(cv2, "CAP_MSMF", 1400), cv2.CAP_ANY)
+elif _IS_MAC:
+    _BACKENDS = _PROBE_BACKENDS = (cv2.CAP_AVFOUNDATION, cv2.CAP_ANY)
+else:
+    _BACKENDS = _PROBE_BACKENDS = (cv2.CAP_V4L2, cv2.CAP_ANY)
+
+
+def open_camera_by_index(index: int):
+    return _open_first([(index, backend) for backend in _BACKENDS], settle=0.2)
+
+
 def probe_camera_index(index: int) -> bool:
     # Minimal probing without heavy config to avoid backend warnings where possible
-    system = platform.system()
-    if system == "Windows":
-        candidates = [getattr(cv2, "CAP_MSMF", 1400), cv2.CAP_ANY]
-    elif system == "Darwin":
-        candidates = [cv2.CAP_AVFOUNDATION, cv2.CAP_ANY]
-    else:
-        candidates = [cv2.CAP_V4L2, cv2.CAP_ANY]
-    for backend in candidates:
+    for backend in _PROBE_BACKENDS:
         cap = None
         try:
             cap = cv2.VideoCapture(index, backend)
@@ -162,7 +425,7 @@ def probe_camera_index(index: int) -> bool:
 
 def list_dshow_device_names_ffmpeg() -> list[str]:
     # Best-effort: use ffmpeg to list DirectShow video devices
-    if platform.system() != "Windows":
+    if not _IS_WIN:
         return []
     if shutil.which("ffmpeg") is None:
         return []
@@ -192,7 +455,7 @@ def list_dshow_device_names_ffmpeg() -> list[str]:
 
 
 def list_dshow_device_names_pygrabber() -> list[str]:
-    if platform.system() != "Windows":
+    if not _IS_WIN:
         return []
     if _PyGrabberFilterGraph is None:
         return []
@@ -204,46 +467,93 @@ def list_dshow_device_names_pygrabber() -> list[str]:
         return []
 
 
-_DEVICE_NAMES_CACHE: dict[str, object] = {"ts": 0.0, "names": []}
+def list_video_device_names_winrt() -> list[str]:
+    if not _IS_WIN:
+        return []
+    if _WinRTEnum is None:
+        return []
+
+    async def _find() -> list[str]:
+        devices = await _WinRTEnum.DeviceInformation.find_all_async(_WinRTEnum.DeviceClass.VIDEO_CAPTURE)
+        return [str(d.name) for d in devices if d.name]
+
+    try:
+        return asyncio.run(_find())
+    except Exception:
+        return []
+
+
+_DEFAULT_DEVICE_NAMES = [
+    "Logitech BRIO",
+    "Logitech BRIO 4K",
+    "Logitech BRIO 4K Stream Edition",
+    "Logitech BRIO 500",
+    "BRIO",
+    "Logitech Webcam BRIO",
+    "Integrated Camera",
+    "USB Camera",
+]
+
+_DEVICE_NAMES_CACHE: dict[str, object] = {"ts": 0.0, "names": list(_DEFAULT_DEVICE_NAMES)}
+_NAMES_LOCK = threading.Lock()
+_NAMES_REFRESHING = False
 _INDICES_CACHE: dict[str, object] = {"ts": 0.0, "indices": []}
 _INDICES_LOCK = threading.Lock()
 _INDICES_REFRESHING = False
 
 
-def get_device_names_cached() -> list[str]:
-    now = time.time()
-    ts = _DEVICE_NAMES_CACHE.get("ts") or 0.0
-    if isinstance(ts, (int, float)) and (now - float(ts) < 10.0):
-        cached = _DEVICE_NAMES_CACHE.get("names")
-        return list(cached) if isinstance(cached, list) else []
-    # Prefer pygrabber (DirectShow) when available; else use ffmpeg
+def _refresh_device_names() -> list[str]:
+    # Prefer in-process enumeration (pygrabber/DirectShow, then WinRT); ffmpeg is the last resort
     names = list_dshow_device_names_pygrabber()
+    if not names:
+        names = list_video_device_names_winrt()
     if not names:
         names = list_dshow_device_names_ffmpeg()
     if not names:
         # Provide sensible defaults if detection fails
-        names = [
-            "Logitech BRIO",
-            "Logitech BRIO 4K",
-            "Logitech BRIO 4K Stream Edition",
-            "Logitech BRIO 500",
-            "BRIO",
-            "Logitech Webcam BRIO",
-            "Integrated Camera",
-            "USB Camera",
-        ]
-    _DEVICE_NAMES_CACHE["ts"] = now
-    _DEVICE_NAMES_CACHE["names"] = names
+        names = list(_DEFAULT_DEVICE_NAMES)
+    with _NAMES_LOCK:
+        _DEVICE_NAMES_CACHE["ts"] = time.time()
+        _DEVICE_NAMES_CACHE["names"] = names
+    return names
+
+
+def _refresh_names_worker():
+    global _NAMES_REFRESHING
+    try:
+        _refresh_device_names()
+    finally:
+        _NAMES_REFRESHING = False
+
+
+def get_device_names_cached() -> list[str]:
+    global _NAMES_REFRESHING
+    now = time.time()
+    with _NAMES_LOCK:
+        ts = _DEVICE_NAMES_CACHE.get("ts") or 0.0
+        cached = _DEVICE_NAMES_CACHE.get("names")
+        names = list(cached) if isinstance(cached, list) else []
+        # Hot-plug is rare and /rescan_cameras forces a refresh, so a long TTL is fine
+        if isinstance(ts, (int, float)) and (now - float(ts) < 60.0):
+            return names
+        # Stale: serve the last-known names and enumerate in the background
+        if not _NAMES_REFRESHING:
+            _NAMES_REFRESHING = True
+            t = threading.Thread(target=_refresh_names_worker, daemon=True)
+            t.start()
     return names
 
 
 def _refresh_indices_worker():
     global _INDICES_REFRESHING
     try:
-        found: list[int] = []
-        for i in range(16):
-            if probe_camera_index(i):
-                found.append(i)
+        # Devices we already hold open may refuse a second open; count them as present
+        held = set(CAMERA.held_indices())
+        to_probe = [i for i in range(16) if i not in held]
+        # Device opens are I/O-bound and OpenCV releases the GIL, so probe all indices at once
+        with ThreadPoolExecutor(max_workers=8) as ex:
+            results = list(ex.map(probe_camera_index, to_probe))
+        found = sorted(held | {i for i, ok in zip(to_probe, results) if ok})
         with _INDICES_LOCK:
             _INDICES_CACHE["ts"] = time.time()
             _INDICES_CACHE["indices"] = found
@@ -251,32 +561,34 @@ def _refresh_indices_worker():
         _INDICES_REFRESHING = False
 
 
-def get_indices_cached() -> list[int]:
-    now = time.time()
-    with _INDICES_LOCK:
-        ts = _INDICES_CACHE.get("ts") or 0.0
-        if isinstance(ts, (int, float)) and (now - float(ts) < 5.0):
-            cached = _INDICES_CACHE.get("indices")
-            return list(cached) if isinstance(cached, list) else []
-    # Quick first-fill: probe a small range synchronously
-    quick_found: list[int] = []
-    for i in range(4):
-        if probe_camera_index(i):
-            quick_found.append(i)
+def _schedule_indices_refresh() -> None:
+    global _INDICES_REFRESHING
     with _INDICES_LOCK:
-        _INDICES_CACHE["ts"] = now
-        _INDICES_CACHE["indices"] = quick_found
-        global _INDICES_REFRESHING
         if not _INDICES_REFRESHING:
             _INDICES_REFRESHING = True
             t = threading.Thread(target=_refresh_indices_worker, daemon=True)
             t.start()
-    return quick_found
+
+
+def get_indices_cached() -> list[int]:
+    # Pure cache read: never probes on the request thread (the cache is seeded at startup)
+    now = time.time()
+    with _INDICES_LOCK:
+        ts = _INDICES_CACHE.get("ts") or 0.0
+        cached = _INDICES_CACHE.get("indices")
+        indices = list(cached) if isinstance(cached, list) else []
+        if isinstance(ts, (int, float)) and (now - float(ts) < 5.0):
+            return indices
+    _schedule_indices_refresh()
+    if not ts:
+        # Startup scan still running: list at least the current camera so the UI has a valid choice
+        indices = sorted(set(CAMERA.held_indices()) | {CAMERA.camera_index})
+    return indices
 
 
 def open_camera_by_name(device_name: str):
     # Windows only: open by DirectShow device name for reliable BRIO selection
-    if platform.system() != "Windows":
+    if not _IS_WIN:
         return None
     # Try several likely device name variants
     base = device_name.strip()
@@ -295,78 +607,62 @@ def open_camera_by_name(device_name: str):
             "BRIO",
             "Logitech Webcam BRIO",
         ])
-    tried = set()
+    names: list[str] = []
     for name in candidates:
-        if not name or name in tried:
-            continue
-        tried.add(name)
-        source = f"video={name}"
-        cap = cv2.VideoCapture(source, getattr(cv2, "CAP_DSHOW", 700))
-        if not cap.isOpened():
-            try:
-                cap.release()
-            except Exception:
-                pass
-            continue
-        # Configure and verify a frame
-        try:
-            try:
-                fourcc = cv2.VideoWriter_fourcc(*"MJPG")
-                cap.set(cv2.CAP_PROP_FOURCC, fourcc)
-                cap.set(cv2.CAP_PROP_FPS, 30)
-            except Exception:
-                pass
-            for (w, h) in [(1920, 1080), (1280, 720), (640, 480)]:
-                try:
-                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, w)
-                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, h)
-                except Exception:
-                    pass
-                time.sleep(0.12)
-                for _ in range(4):
-                    cap.read()
-                ok, frame = cap.read()
-                if ok and frame is not None:
-                    return cap
-        except Exception:
-            pass
+        if name and name not in names:
+            names.append(name)
+    dshow = getattr(cv2, "CAP_DSHOW", 700)
+    return _open_first([(f"video={name}", dshow) for name in names], settle=0.12)
+
+
+def _aligned_empty(shape, dtype=np.uint8, align: int = 64):
+    # Over-allocate and slice so the data starts on an `align`-byte boundary (SIMD-friendly)
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    raw = np.empty(nbytes + align - 1, dtype=np.uint8)
+    offset = (-raw.ctypes.data) % align
+    return raw[offset:offset + nbytes].view(dtype).reshape(shape)
+
+
+def _tune_reader_thread() -> None:
+    # Keep the frame reader on one core (CAMERA_READER_CPU) and ahead of HTTP threads to cut jitter
+    cpu = os.environ.get("CAMERA_READER_CPU", "").strip()
+    if _IS_WIN:
         try:
-            cap.release()
+            import ctypes
+
+            kernel32 = ctypes.windll.kernel32  # type: ignore[attr-defined]
+            handle = kernel32.GetCurrentThread()
+            if cpu.isdigit():
+                kernel32.SetThreadAffinityMask(handle, ctypes.c_size_t(1 << int(cpu)))
+            kernel32.SetThreadPriority(handle, 1)  # THREAD_PRIORITY_ABOVE_NORMAL
         except Exception:
             pass
-    return None
-    try:
-        # Configure for stability
+        return
+    if cpu.isdigit() and hasattr(os, "sched_setaffinity"):
         try:
-            fourcc = cv2.VideoWriter_fourcc(*"MJPG")
-            cap.set(cv2.CAP_PROP_FOURCC, fourcc)
-            cap.set(cv2.CAP_PROP_FPS, 30)
+            # pid 0 targets the calling thread on Linux
+            os.sched_setaffinity(0, {int(cpu)})
         except Exception:
             pass
-        for (w, h) in [(1920, 1080), (1280, 720), (640, 480)]:
-            try:
-                cap.set(cv2.CAP_PROP_FRAME_WIDTH, w)
-                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, h)
-            except Exception:
-                pass
-            time.sleep(0.15)
-            for _ in range(4):
-                cap.read()
-            ok, frame = cap.read()
-            if ok and frame is not None:
-                return cap
-    except Exception:
-        pass
-    try:
-        cap.release()
-    except Exception:
-        pass
-    return None
+
+
+def _release_after_exit(reader: threading.Thread, cap) -> None:
+    # A capture must not be reused or released under a reader that is still inside grab()
+    reader.join()
+    _release_quietly(cap)
+
+
+# Spare devices kept open for instant switching. Opt-in (default 0): pooled cameras stay locked
+# away from other apps and keep using USB bandwidth
+CAMERA_POOL_SIZE = int(os.environ.get("CAMERA_POOL_SIZE", "0"))
 
 
 class CameraManager:
     def __init__(self, index: int = 0, mode: str = "index", device_name: str | None = None) -> None:
         self.lock = threading.Lock()
+        # Serializes open/close so concurrent start/switch calls never double-open the device
+        self._start_lock = threading.Lock()
         self.camera_index = index
         self.camera_mode = mode  # 'index' or 'name'
         self.camera_device_name = device_name or ""
@@ -374,68 +670,210 @@ class CameraManager:
         self.thread = None
         self.running = False
         self.last_frame = None
+        # Triple buffer: the reader fills _writing while consumers read _published without locking;
+        # the third slot holds the previous frame so a consumer mid-encode is never overwritten
+        self._buffers: list = [None, None, None]
+        self._published = 0
+        self._writing = 1
+        # Downscaled stream copy per slot, so a preview being encoded is never resized over
+        self._previews: list = [None, None, None]
+        self.last_preview = None
+        # Bumped per published frame; stream clients wait on the condition instead of polling
+        self.frame_id = 0
+        self._new_frame = threading.Condition(self.lock)
+        # Camera-encoded JPEG for the stream when MJPG pass-through is active
+        self._last_jpeg: bytes | None = None
+        # Warm spare captures keyed by index (LRU), so switching to a pooled index skips the open
+        self._pool: OrderedDict[int, object] = OrderedDict()
+        self._pool_lock = threading.Lock()
+        self._open_index: int | None = None  # index the current capture was opened by, if any
 
     def start(self, index: int | None = None, device_name: str | None = None, mode: str | None = None) -> bool:
-        if index is not None:
-            self.camera_index = int(index)
-        if device_name is not None:
-            self.camera_device_name = str(device_name)
-        if mode in ("index", "name"):
-            self.camera_mode = str(mode)
-        self.stop()
-        if self.camera_mode == "name" and self.camera_device_name:
-            self.cap = open_camera_by_name(self.camera_device_name) or open_camera_by_index(self.camera_index)
-        else:
-            self.cap = open_camera_by_index(self.camera_index)
-        if self.cap is None:
-            return False
-        self.running = True
-        self.thread = threading.Thread(target=self._reader, daemon=True)
-        self.thread.start()
-        return True
+        with self._start_lock:
+            if index is not None:
+                self.camera_index = int(index)
+            if device_name is not None:
+                self.camera_device_name = str(device_name)
+            if mode in ("index", "name"):
+                self.camera_mode = str(mode)
+            prev_index, prev_cap = self._open_index, self._halt()
+            if self.camera_mode == "name" and self.camera_device_name:
+                # An index-opened capture (current or pooled) may be this very device under
+                # another backend and would block the open by name; free every handle first
+                if prev_cap is not None:
+                    _release_quietly(prev_cap)
+                self._clear_pool()
+                self.cap = open_camera_by_name(self.camera_device_name)
+            elif prev_cap is not None:
+                if prev_index is not None:
+                    # Trim only after the new device is taken so parking cannot evict it
+                    self._park(prev_index, prev_cap, trim=False)
+                else:
+                    _release_quietly(prev_cap)
+            if self.cap is None:
+                self.cap = self._take_or_open(self.camera_index)
+            self._trim_pool()
+            if self.cap is None:
+                return False
+            self.running = True
+            self.thread = threading.Thread(target=self._reader, daemon=True)
+            self.thread.start()
+            return True
 
     def _reader(self) -> None:
-        # Warm-up reads
-        try:
-            for _ in range(5):
-                if self.cap is None:
-                    break
-                self.cap.read()
-        except Exception:
-            pass
-        while self.running:
+        # One dedicated thread per opened camera. grab() blocks inside OpenCV with the GIL
+        # released; only the publish step below takes the lock.
+        me = threading.current_thread()
+        cap = self.cap
+        # Slot lists of this session; _halt swaps in fresh ones, so a late reader only touches its own
+        buffers, previews = self._buffers, self._previews
+        _tune_reader_thread()
+        while self.running and self.thread is me:
             try:
-                if self.cap is None:
+                if cap is None:
                     time.sleep(0.02)
                     continue
-                ok, frame = self.cap.read()
+                if not cap.grab():
+                    time.sleep(0.01)
+                    continue
+                slot = self._writing
+                # Decode into the back slot; OpenCV reuses it when the shape matches
+                ok, frame = cap.retrieve(buffers[slot])
                 if ok and frame is not None:
+                    if frame is not buffers[slot] and frame.ndim == 3:
+                        # New or resized slot: move into a 64-byte aligned buffer that later reads reuse
+                        aligned = _aligned_empty(frame.shape, frame.dtype)
+                        np.copyto(aligned, frame)
+                        frame = aligned
+                    jpeg = _as_jpeg_bytes(frame)
+                    buffers[slot] = frame
+                    preview = self._make_preview(previews, slot, frame) if jpeg is None else None
                     with self.lock:
+                        # Replaced while blocked in grab()/retrieve(): never publish into the next session
+                        if self.thread is not me:
+                            break
+                        # Next write goes to the oldest slot (slot indices sum to 3)
+                        self._published, self._writing = slot, 3 - slot - self._published
                         self.last_frame = frame
+                        self.last_preview = preview if preview is not None else frame
+                        self._last_jpeg = jpeg
+                        self.frame_id += 1
+                        self._new_frame.notify_all()
                 else:
                     time.sleep(0.01)
             except Exception:
                 time.sleep(0.02)
 
-    def stop(self) -> None:
+    def _make_preview(self, previews: list, slot: int, frame):
+        h, w = frame.shape[:2]
+        if STREAM_PREVIEW_WIDTH <= 0 or w <= STREAM_PREVIEW_WIDTH:
+            return None
+        size = (STREAM_PREVIEW_WIDTH, max(1, round(h * STREAM_PREVIEW_WIDTH / w)))
+        preview = previews[slot]
+        if preview is None or preview.shape[1::-1] != size:
+            preview = _aligned_empty((size[1], size[0], frame.shape[2]), frame.dtype)
+            previews[slot] = preview
+        # INTER_AREA is OpenCV's SIMD-accelerated downscaler; dst reuse avoids an allocation per frame
+        cv2.resize(frame, size, dst=preview, interpolation=cv2.INTER_AREA)
+        return preview
+
+    def _halt(self):
+        # Stop the reader and detach the capture without releasing it. Returns None while the
+        # old reader is still stuck in grab(); that capture is released once the thread exits.
         self.running = False
-        if self.thread is not None:
-            try:
-                self.thread.join(timeout=0.5)
-            except Exception:
-                pass
-        self.thread = None
-        if self.cap is not None:
+        with self.lock:
+            reader, self.thread = self.thread, None
+        if reader is not None:
             try:
-                self.cap.release()
+                reader.join(timeout=0.5)
             except Exception:
                 pass
-        self.cap = None
+        cap, self.cap = self.cap, None
+        self._open_index = None
         with self.lock:
             self.last_frame = None
+            self.last_preview = None
+            self._last_jpeg = None
+            self._buffers = [None, None, None]
+            self._previews = [None, None, None]
+            self._published, self._writing = 0, 1
+        if cap is not None and reader is not None and reader.is_alive():
+            threading.Thread(target=_release_after_exit, args=(reader, cap), daemon=True).start()
+            return None
+        return cap
+
+    def stop(self) -> None:
+        cap = self._halt()
+        if cap is not None:
+            _release_quietly(cap)
+
+    def _park(self, index: int, cap, trim: bool = True) -> None:
+        with self._pool_lock:
+            duplicate = index in self._pool
+            if not duplicate:
+                self._pool[index] = cap
+        if duplicate:
+            _release_quietly(cap)
+        if trim:
+            self._trim_pool()
+
+    def _trim_pool(self) -> None:
+        evicted = []
+        with self._pool_lock:
+            while len(self._pool) > max(CAMERA_POOL_SIZE, 0):
+                evicted.append(self._pool.popitem(last=False)[1])
+        # Release outside the lock; closing a device can take a while
+        for old in evicted:
+            _release_quietly(old)
+
+    def _clear_pool(self) -> None:
+        with self._pool_lock:
+            pooled = list(self._pool.values())
+            self._pool.clear()
+        for old in pooled:
+            _release_quietly(old)
+
+    def _take_or_open(self, index: int):
+        with self._pool_lock:
+            cap = self._pool.pop(index, None)
+        # A pooled device may have been unplugged since it was parked
+        if cap is not None and not cap.grab():
+            _release_quietly(cap)
+            cap = None
+        if cap is None:
+            cap = open_camera_by_index(index)
+        if cap is not None:
+            self._open_index = index
+        return cap
+
+    def held_indices(self) -> list[int]:
+        with self._pool_lock:
+            held = list(self._pool)
+        if self._open_index is not None:
+            held.append(self._open_index)
+        return held
+
+    def warm_pool(self, indices) -> None:
+        # Open spare devices ahead of time (one verified frame each) so switch_camera is a swap
+        for index in indices:
+            with self._start_lock:
+                # The device opened by name has no known index and could be opened twice
+                if self.camera_mode == "name":
+                    return
+                with self._pool_lock:
+                    if len(self._pool) >= CAMERA_POOL_SIZE:
+                        return
+                    if index in self._pool:
+                        continue
+                if index == self._open_index:
+                    continue
+                cap = open_camera_by_index(index)
+                if cap is not None:
+                    self._park(index, cap)
 
     def switch_camera(self, index: int) -> bool:
         index = int(index)
+        # Already streaming from this device: keep the warm capture, no re-open
         if self.running and self.camera_mode == "index" and index == self.camera_index:
             return True
         return self.start(index=index, mode="index")
@@ -446,23 +884,47 @@ class CameraManager:
             return True
         return self.start(device_name=device_name, mode="name")
 
-    def get_jpeg(self) -> bytes | None:
-        frame = None
-        with self.lock:
-            if self.last_frame is not None:
-                frame = self.last_frame.copy()
+    def wait_for_frame(self, last_id: int, timeout: float = 1.0) -> int:
+        # Block until a frame newer than last_id is published or the timeout expires
+        with self._new_frame:
+            self._new_frame.wait_for(lambda: self.frame_id != last_id, timeout=timeout)
+            return self.frame_id
+
+    def get_jpeg_since(
+        self, last_id: int, timeout: float = 1.0, out: bytearray | None = None
+    ) -> tuple[bytes | None, int]:
+        # Next frame newer than last_id with its id, or (None, last_id) on timeout.
+        # The id is read after the frame, so a racing publish is skipped rather than re-sent.
+        if self.wait_for_frame(last_id, timeout) == last_id:
+            return None, last_id
+        jpeg = self.get_jpeg(out=out)
+        return jpeg, self.frame_id
+
+    def get_jpeg_raw(self) -> bytes | None:
+        # Camera-encoded JPEG from MJPG pass-through, or None when frames arrive decoded
+        return self._last_jpeg
+
+    def get_jpeg(self, out: bytearray | None = None) -> bytes | None:
+        jpeg = self.get_jpeg_raw()
+        if jpeg is not None:
+            return jpeg
+        # Lock-free, no copy: attribute reads are atomic and the published slot is not
+        # rewritten until two more frames have arrived. The stream encodes the preview.
+        frame = self.last_preview
         if frame is None:
             return None
-        ok, buf = cv2.imencode('.jpg', frame)
-        if not ok:
-            return None
-        return bytes(buf)
+        return encode_jpeg(frame, STREAM_JPEG_QUALITY, subsampling=STREAM_JPEG_SUBSAMPLING, out=out)
 
     def capture_frame(self):
-        with self.lock:
-            if self.last_frame is None:
+        jpeg = self._last_jpeg
+        if jpeg is None:
+            frame = self.last_frame
+            if frame is None:
                 return None
-            return self.last_frame.copy()
+            # Saved stills keep their own copy so a slow encode/write can never tear
+            return frame.copy()
+        # Pass-through mode: decode to BGR only for callers that need pixels (/capture saves the JPEG)
+        return decode_jpeg(jpeg)
 
     def get_property(self, prop_id: int):
         with self.lock:
@@ -496,12 +958,14 @@ CAMERA_MODE = os.environ.get("CAMERA_MODE", "index") if os.environ.get("CAMERA_M
 CAMERA_DEVICE_NAME = os.environ.get("CAMERA_DEVICE_NAME", "")
 CAMERA = CameraManager(index=int(os.environ.get("CAMERA_INDEX", "0")), mode=CAMERA_MODE, device_name=CAMERA_DEVICE_NAME)
 CAMERA.start()
+# Seed the index cache so the first /config is already warm
+_schedule_indices_refresh()
 
 
 def _autoselect_brio_worker():
     # If running on Windows, try to switch to BRIO by name shortly after startup
     try:
-        if platform.system() != "Windows":
+        if not _IS_WIN:
             return
         time.sleep(0.6)
         # Only attempt if still on index mode and no frames yet
@@ -510,7 +974,8 @@ def _autoselect_brio_worker():
             current_mode = CAMERA.camera_mode
         if has_frame or current_mode != "index":
             return
-        names = get_device_names_cached()
+        # Already on a background thread: enumerate now rather than take the startup defaults
+        names = _refresh_device_names()
         for name in names:
             if isinstance(name, str) and "brio" in name.lower():
                 try:
@@ -525,21 +990,71 @@ def _autoselect_brio_worker():
 threading.Thread(target=_autoselect_brio_worker, daemon=True).start()
 
 
+def _warm_pool_worker():
+    # Once the startup index scan lands, pre-open the other cameras as hot spares
+    try:
+        if CAMERA_POOL_SIZE <= 0:
+            return
+        for _ in range(60):
+            with _INDICES_LOCK:
+                scanned = bool(_INDICES_CACHE.get("ts"))
+            if scanned:
+                break
+            time.sleep(0.5)
+        CAMERA.warm_pool(get_indices_cached())
+    except Exception:
+        pass
+
+
+threading.Thread(target=_warm_pool_worker, daemon=True).start()
+
+
 @app.get("/")
 def index():
     return render_template("index.html")
 
 
+# Per-part header pieces; Content-Length lets browsers render a part without waiting for the next boundary
+_MJPEG_HEAD = b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: "
+_MJPEG_MID = b"\r\n\r\n"
+_MJPEG_SUFFIX = b"\r\n"
+
+
 @app.get("/stream")
 def stream():
+    # Set by waitress (channel_request_lookahead > 0); lets an idle stream notice a closed client
+    client_disconnected = request.environ.get("waitress.client_disconnected")
+
     def generate():
+        last_id = CAMERA.frame_id
+        last_sent = 0.0
+        # Per-client encode scratch buffer (clients must not share one)
+        jpeg_buf = bytearray()
         while True:
-            frame_bytes = CAMERA.get_jpeg()
-            if frame_bytes is not None:
-                yield (b"--frame\r\n"
-                       b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n")
-            time.sleep(0.03)  # ~30 fps
-    return Response(generate(), mimetype="multipart/x-mixed-replace; boundary=frame")
+            # Cap per-client rate; a slow client skips frames instead of queueing them
+            delay = 1.0 / STREAM_MAX_FPS - (time.monotonic() - last_sent)
+            if delay > 0:
+                time.sleep(delay)
+            frame_bytes, last_id = CAMERA.get_jpeg_since(last_id, out=jpeg_buf)
+            if frame_bytes is None:
+                # No frames (camera down or switching): without a yield a gone client is never
+                # noticed, so check explicitly and give the server thread back
+                if client_disconnected is not None and client_disconnected():
+                    return
+                continue
+            last_sent = time.monotonic()
+            # Separate chunks avoid building a frame-sized temporary per part
+            yield _MJPEG_HEAD
+            yield b"%d%s" % (len(frame_bytes), _MJPEG_MID)
+            yield frame_bytes
+            yield _MJPEG_SUFFIX
+    return Response(
+        generate(),
+        mimetype="multipart/x-mixed-replace; boundary=frame",
+        direct_passthrough=True,
+        # Stop reverse proxies (nginx) from buffering the never-ending response
+        headers={"X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/config")
@@ -562,13 +1077,11 @@ def rescan_cameras():
     # Non-blocking rescan: trigger background refresh and return cached immediately
     try:
         with _INDICES_LOCK:
-            global _INDICES_REFRESHING
             _INDICES_CACHE["ts"] = 0.0
-            if not _INDICES_REFRESHING:
-                _INDICES_REFRESHING = True
-                t = threading.Thread(target=_refresh_indices_worker, daemon=True)
-                t.start()
-        indices = _INDICES_CACHE.get("indices") or []
+            indices = _INDICES_CACHE.get("indices") or []
+        _schedule_indices_refresh()
+        with _NAMES_LOCK:
+            _DEVICE_NAMES_CACHE["ts"] = 0.0
         names = get_device_names_cached()
         return jsonify({"ok": True, "available_indices": list(indices), "available_device_names": names})
     except Exception:
@@ -617,7 +1130,7 @@ def get_camera_props():
                 props["auto_exposure"] = None
             else:
                 v = float(ae)
-                props["auto_exposure"] = bool(v >= 0.5) if platform.system() != "Windows" else bool(v >= 0.5)
+                props["auto_exposure"] = bool(v >= 0.5)
     except Exception:
         pass
     return jsonify({"ok": True, "props": props})
@@ -647,7 +1160,7 @@ def set_camera_props():
             results["auto_white_balance"] = False
     if hasattr(cv2, "CAP_PROP_AUTO_EXPOSURE") and "auto_exposure" in data:
         try:
-            if platform.system() == "Windows":
+            if _IS_WIN:
                 val = 0.75 if bool(data["auto_exposure"]) else 0.25
             else:
                 val = 1.0 if bool(data["auto_exposure"]) else 0.0
@@ -697,10 +1210,12 @@ def set_config():
     if "save_dir" in data:
         new_dir = str(data["save_dir"]).strip()
         try:
+            # Always re-verify an explicitly configured folder
+            _VALID_DIRS.discard(os.path.normpath(new_dir))
             ensure_dir(new_dir)
             CURRENT_SAVE_DIR = new_dir
             # Recompute Windows filename compatibility based on host OS
-            CURRENT_FOR_WINDOWS = platform.system().lower().startswith("win")
+            CURRENT_FOR_WINDOWS = _IS_WIN
         except Exception:
             errors.append("Failed to use save_dir")
 
@@ -714,22 +1229,44 @@ def set_config():
     })
 
 
+# Tk objects may only be used from the thread that created them, and creating a root is slow:
+# a single dialog thread owns one hidden root that is reused across /choose_dir requests
+_DIALOG_EXECUTOR = ThreadPoolExecutor(max_workers=1)
+_TK_ROOT = None
+
+
+def _ask_directory(initialdir: str) -> str:
+    global _TK_ROOT
+    import tkinter as tk  # type: ignore
+    from tkinter import filedialog  # type: ignore
+
+    if _TK_ROOT is None:
+        _TK_ROOT = tk.Tk()
+        _TK_ROOT.withdraw()
+        _TK_ROOT.attributes("-topmost", True)
+    try:
+        return filedialog.askdirectory(parent=_TK_ROOT, initialdir=initialdir, mustexist=False, title="Choose save directory")
+    except Exception:
+        # Root is unusable (e.g. display went away); rebuild it on the next request
+        try:
+            _TK_ROOT.destroy()
+        except Exception:
+            pass
+        _TK_ROOT = None
+        raise
+
+
 @app.post("/choose_dir")
 def choose_dir():
     # Open a native directory selection dialog on the server machine
     try:
-        import tkinter as tk  # type: ignore
-        from tkinter import filedialog  # type: ignore
+        import tkinter  # type: ignore  # noqa: F401
     except Exception:
         return jsonify({"ok": False, "error": "Folder dialog not available (tkinter missing)"}), 500
 
     selected: str | None = None
     try:
-        root = tk.Tk()
-        root.withdraw()
-        root.attributes("-topmost", True)
-        selected = filedialog.askdirectory(initialdir=CURRENT_SAVE_DIR or APP_DIR, mustexist=False, title="Choose save directory")
-        root.destroy()
+        selected = _DIALOG_EXECUTOR.submit(_ask_directory, CURRENT_SAVE_DIR or APP_DIR).result()
     except Exception:
         return jsonify({"ok": False, "error": "Failed to open folder dialog"}), 500
 
@@ -759,17 +1296,48 @@ def capture():
     filename = format_filename(base, for_windows=CURRENT_FOR_WINDOWS)
     out_path = os.path.join(save_dir, filename)
 
-    frame = CAMERA.capture_frame()
-    if frame is None:
-        return jsonify({"ok": False, "error": "No frame available from camera"}), 500
+    # Pass-through mode: save the camera's own JPEG as-is (no decode/re-encode generation loss)
+    buf = CAMERA.get_jpeg_raw()
+    if buf is None:
+        frame = CAMERA.capture_frame()
+        if frame is None:
+            return jsonify({"ok": False, "error": "No frame available from camera"}), 500
+
+        buf = encode_jpeg(frame, CAPTURE_JPEG_QUALITY, subsampling=CAPTURE_JPEG_SUBSAMPLING)
+        if buf is None:
+            return jsonify({"ok": False, "error": "Failed to encode image"}), 500
+    _submit_capture_write(out_path, buf)
+
+    failed = sorted(_FAILED_WRITES)
+    _FAILED_WRITES.difference_update(failed)
+    return jsonify({"ok": True, "saved_path": out_path, "filename": filename, "failed_writes": failed})
 
-    if not cv2.imwrite(out_path, frame):
-        return jsonify({"ok": False, "error": "Failed to write image"}), 500
 
-    return jsonify({"ok": True, "saved_path": out_path, "filename": filename})
+@app.get("/capture_status")
+def capture_status():
+    with _WRITES_LOCK:
+        pending = sorted(_PENDING_WRITES)
+    return jsonify({"ok": True, "pending": pending, "failed": sorted(_FAILED_WRITES)})
 
 
 if __name__ == "__main__":
-    app.run(host="localhost", port=8000, debug=False)
+    try:
+        from waitress import serve  # type: ignore
+    except Exception:
+        serve = None
+    if serve is not None:
+        # Each open /stream holds one worker thread; the lookahead lets waitress flag clients that
+        # disconnected, so idle streams release their thread instead of starving the API routes
+        serve(
+            app,
+            host="localhost",
+            port=8000,
+            threads=int(os.environ.get("SERVER_THREADS", "8")),
+            connection_limit=64,
+            channel_request_lookahead=1,
+        )
+    else:
+        # threaded=True is already Flask's default; spelled out because /stream relies on it
+        app.run(host="localhost", port=8000, debug=False, threaded=True)
 
 